@@ -1,25 +1,80 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, Response
 import pandas as pd
-from predict import predict_all, load_default_dataframe
+from predict import (predict_all, load_default_dataframe, load_stream_dataframe,
+                     append_live_rows, load_models, set_models, RUNTIME_MODEL_DIR)
 from gemini_ai import generate_summary
+from drift import DriftMonitor
+from reputation import reload_index
+from stream_codec import MIMETYPE, encode_binary, encode_json
+from train_models import load_training_data, train_from_dataframe
 
 app = Flask(__name__)
 
+# Serving model is loaded once; predict_all never refits per request
+load_models()
+
+
+def retrain_and_swap(df):
+    # Runtime retrains go to a git-ignored directory, never over models/*.pkl
+    result = train_from_dataframe(df, model_dir=RUNTIME_MODEL_DIR)
+    if result is not None:
+        set_models(*result)
+
+
+# Reference sketches come from the training data; live rows arrive via POST /ingest
+drift_monitor = DriftMonitor(retrain_fn=retrain_and_swap)
+_train_df = load_training_data()
+drift_monitor.fit_reference(_train_df if _train_df is not None else load_default_dataframe())
+
+# Compile local threat feeds (data/feeds) into the memory-mapped reputation index
+reload_index()
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
 @app.route("/predict-stream", methods=["GET"])
 def predict_stream():
+    # ?points=<chart width> downsamples the score series (LTTB)
+    points = request.args.get("points")
+    if points is not None:
+        if not points.isdigit() or int(points) < 3:
+            return jsonify({"error": "points must be an integer >= 3"}), 400
+        points = int(points)
+
     try:
-        df = load_default_dataframe().tail(200)
+        df = load_stream_dataframe(200)
         out = predict_all(df)
+        out["drift"] = drift_monitor.status()
         print("📡 Sent Data Snapshot:", {k: type(v) for k, v in out.items()})
-        return jsonify(out)
+
+        binary = request.args.get("format") == "bin" or \
+            request.accept_mimetypes.best_match(["application/json", MIMETYPE]) == MIMETYPE
+        if binary:
+            resp = Response(encode_binary(out, points), mimetype=MIMETYPE)
+        else:
+            resp = jsonify(encode_json(out, points))
+        resp.headers["Vary"] = "Accept"
+        return resp
     except Exception as e:
         print("❌ ERROR:", e)
         return jsonify({"error": str(e)})
 
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    """Accept new flow records (JSON list) as live traffic for scoring and drift"""
+    records = request.get_json(silent=True)
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "expected a JSON list of flow records"}), 400
+    try:
+        rows = append_live_rows(records)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    drift = drift_monitor.update(rows)
+    return jsonify({"accepted": len(rows), "drift": drift})
+
 @app.route("/dataset-preview", methods=["GET"])
 def dataset_preview():
     try:
@@ -29,6 +84,22 @@ def dataset_preview():
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route("/drift", methods=["GET"])
+def drift_status():
+    try:
+        return jsonify(drift_monitor.status())
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+@app.route("/reload-reputation", methods=["POST"])
+def reload_reputation():
+    try:
+        index = reload_index()
+        return jsonify({"ranges": len(index)})
+    except Exception as e:
+        print("❌ Reputation reload error:", e)
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/ai-summary")
 def ai_summary():
     try:
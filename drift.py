@@ -0,0 +1,237 @@
+"""
+drift.py — Incremental Data-Drift Monitor
+-----------------------------------------
+Keeps fixed-bin histogram sketches of each monitored feature for:
+- the training reference (built once from the training data)
+- the live window (exponentially decayed by row count, updated per batch)
+and computes PSI / KS drift scores in O(bins) per batch.
+Drift is only reported once the live window holds enough rows; then a
+background retrain is scheduled through train_models and the reference
+is rebuilt from the training data plus the new rows.
+"""
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+BASE_FEATURES = ["length", "src_port", "dst_port"]
+ENGINEERED_FEATURES = ["ephemeral_src", "well_known_dst"]
+DRIFT_FEATURES = BASE_FEATURES + ENGINEERED_FEATURES
+
+PSI_THRESHOLD = 0.25      # > 0.25 is the usual "significant shift" cut-off
+KS_THRESHOLD = 0.3
+HALF_LIFE_ROWS = 5000     # live rows after which older rows weigh half
+MIN_LIVE_ROWS = 200       # floor for the effective live count before drift can fire
+EPS = 1e-6
+
+
+def engineer_features(df):
+    """Add the derived columns the monitor tracks (returns a new frame)."""
+    df = df.copy()
+    if "src_port" in df.columns:
+        df["ephemeral_src"] = (df["src_port"] >= 49152).astype(int)
+    if "dst_port" in df.columns:
+        df["well_known_dst"] = (df["dst_port"] < 1024).astype(int)
+    return df
+
+
+def _newest_timestamp(df):
+    if "timestamp" not in df.columns:
+        return None
+    ts = pd.to_datetime(df["timestamp"], errors="coerce")
+    return ts.max() if ts.notna().any() else None
+
+
+class FeatureSketch:
+    """Fixed-bin histogram over the bin edges learnt from the reference data"""
+
+    def __init__(self, values, n_bins=20):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        # Quantile edges, de-duplicated so discrete features collapse to few bins
+        qs = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]) if len(values) else []
+        self.edges = np.unique(qs)
+        self.ref = self._bin_counts(values)
+        self.live = np.zeros_like(self.ref)
+
+    @property
+    def n_bins(self):
+        return len(self.edges) + 1
+
+    def _bin_counts(self, values):
+        idx = np.searchsorted(self.edges, values, side="right")
+        return np.bincount(idx, minlength=len(self.edges) + 1).astype(float)
+
+    @property
+    def live_count(self):
+        return float(self.live.sum())
+
+    def update(self, values, decay=1.0):
+        """Fold a new batch into the live sketch (older counts scaled by decay)"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        self.live = decay * self.live + self._bin_counts(values)
+
+    def scores(self):
+        """
+        Drift scores between reference and live sketch
+        Returns:
+            psi: Population Stability Index
+            ks: max CDF gap over bin boundaries (binned KS statistic)
+        """
+        if self.live.sum() == 0 or self.ref.sum() == 0:
+            return 0.0, 0.0
+        p = self.ref / self.ref.sum()
+        q = self.live / self.live.sum()
+        p_s, q_s = np.clip(p, EPS, None), np.clip(q, EPS, None)
+        psi = float(np.sum((q_s - p_s) * np.log(q_s / p_s)))
+        ks = float(np.max(np.abs(np.cumsum(p) - np.cumsum(q))))
+        return psi, ks
+
+
+class DriftMonitor:
+    """Tracks per-feature drift and triggers retraining when needed"""
+
+    def __init__(self, features=DRIFT_FEATURES, n_bins=20, half_life_rows=HALF_LIFE_ROWS,
+                 min_live_rows=None, psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD,
+                 retrain_fn=None, cooldown=300, max_reference_rows=10000):
+        self.features = list(features)
+        self.n_bins = n_bins
+        self.half_life_rows = half_life_rows
+        # Fewer live rows than this give noisy PSI/KS, so drift can't fire yet
+        self.min_live_rows = min_live_rows if min_live_rows is not None \
+            else max(n_bins * 10, MIN_LIVE_ROWS)
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.retrain_fn = retrain_fn
+        self.cooldown = cooldown
+        self.max_reference_rows = max_reference_rows
+
+        self.sketches = {}
+        self.reference_df = None
+        self.last_seen = None       # newest timestamp already counted
+        self.live_rows = 0
+        self.live_count = 0.0       # effective (decayed) rows in the live window
+        self.last_scores = {}
+        self.drifted = False
+        self.retraining = False
+        self.last_retrain = None
+        self.retrain_count = 0
+        self._lock = threading.Lock()
+
+    def fit_reference(self, df):
+        """
+        Build reference sketches from training data and reset the live window.
+        Rows up to the newest reference timestamp are never counted as live.
+        """
+        df = df.tail(self.max_reference_rows)
+        eng = engineer_features(df)
+        sketches = {
+            f: FeatureSketch(eng[f].values, n_bins=self.n_bins)
+            for f in self.features if f in eng.columns
+        }
+        newest = _newest_timestamp(df)
+        with self._lock:
+            self.sketches = sketches
+            self.reference_df = df
+            # Old scores were against the previous reference; keep them for the
+            # chart but don't keep reporting drift until new rows are scored
+            self.live_count = 0.0
+            self.drifted = False
+            if newest is not None and (self.last_seen is None or newest > self.last_seen):
+                self.last_seen = newest
+        return self
+
+    def _unseen(self, df):
+        """Rows newer than anything already counted (all rows if untimed)"""
+        if "timestamp" not in df.columns:
+            return df
+        ts = pd.to_datetime(df["timestamp"], errors="coerce")
+        if self.last_seen is not None:
+            df, ts = df[ts > self.last_seen], ts[ts > self.last_seen]
+        if ts.notna().any():
+            self.last_seen = ts.max()
+        return df
+
+    def update(self, df):
+        """
+        Add the rows of a live batch not seen before and recompute drift scores.
+        Repeated polls of the same window therefore leave the scores unchanged.
+        Returns:
+            status dict (see status())
+        """
+        with self._lock:
+            new = self._unseen(df)
+            if len(new):
+                eng = engineer_features(new)
+                # Decay by rows, not by batch, so a slow trickle still builds a window
+                decay = 0.5 ** (len(new) / self.half_life_rows)
+                scores = {}
+                for f, sketch in self.sketches.items():
+                    if f in eng.columns:
+                        sketch.update(eng[f].values, decay=decay)
+                    psi, ks = sketch.scores()
+                    scores[f] = {"psi": round(psi, 4), "ks": round(ks, 4)}
+                self.last_scores = scores
+                self.live_rows += len(new)
+                self.live_count = min((s.live_count for s in self.sketches.values()), default=0.0)
+                self.drifted = self.live_count >= self.min_live_rows and self._over_threshold()
+            trigger = len(new) > 0 and self.drifted
+
+        if trigger:
+            self._schedule_retrain(new)
+        return self.status()
+
+    def _over_threshold(self):
+        # Caller holds self._lock
+        return any(
+            s["psi"] > self.psi_threshold or s["ks"] > self.ks_threshold
+            for s in self.last_scores.values()
+        )
+
+    def _schedule_retrain(self, batch):
+        if self.retrain_fn is None:
+            return
+        with self._lock:
+            if self.retraining:
+                return
+            if self.last_retrain and time.time() - self.last_retrain < self.cooldown:
+                return
+            self.retraining = True
+            # Retrain on the training data plus the drifted batch, not the batch alone
+            data = pd.concat([self.reference_df, batch], ignore_index=True) \
+                if self.reference_df is not None else batch
+
+        threading.Thread(target=self._retrain, args=(data,), daemon=True).start()
+
+    def _retrain(self, data):
+        try:
+            print("🔁 Drift detected — retraining models in background")
+            self.retrain_fn(data)
+            self.fit_reference(data)
+            with self._lock:
+                self.retrain_count += 1
+        except Exception as e:
+            print("❌ Retrain error:", e)
+        finally:
+            with self._lock:
+                self.retraining = False
+                self.last_retrain = time.time()
+
+    def status(self):
+        """JSON-friendly snapshot for the dashboard"""
+        with self._lock:
+            return {
+                "features": dict(self.last_scores),
+                "drifted": self.drifted,
+                "warming_up": self.live_count < self.min_live_rows,
+                "live_rows": self.live_rows,
+                "live_count": round(self.live_count, 1),
+                "min_live_rows": self.min_live_rows,
+                "psi_threshold": self.psi_threshold,
+                "ks_threshold": self.ks_threshold,
+                "retraining": self.retraining,
+                "retrain_count": self.retrain_count,
+                "last_retrain": self.last_retrain,
+            }
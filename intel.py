@@ -6,16 +6,76 @@ Fetches external reputation data from:
 - AbuseIPDB
 and computes a combined threat score (0–100).
 If API keys aren't provided, returns random mock data.
+Successful results are cached per IP (bounded LRU) so other modules can
+reuse them offline; background prefetches are rate-limited per minute.
 """
 
 import os
 import random
+import threading
+import time
+from collections import OrderedDict, deque
 import requests
 
 # Insert your API keys here
 VIRUSTOTAL_API_KEY = "f63f2bb631b93fa895a82941e8b5377a84e2f4b17180fcd5b6945b126abd6102"
 ABUSEIPDB_API_KEY = "14cb37f71b2bdb12e31184efdeac7cfcee861f5e3b63d35e019b0a2a79c39275fe36703fbf935340"
 
+CACHE_TTL = 3600  # seconds
+MAX_CACHE = 10000  # cached IPs, least recently used evicted first
+PREFETCH_PER_MINUTE = 4  # VirusTotal public API quota
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pending = set()
+_prefetched = deque()  # start times of recent background checks
+_pending_lock = threading.Lock()
+
+
+def get_cached_threat(ip: str):
+    """Return the last check_ip_threat result for ip, or None if missing/expired"""
+    with _cache_lock:
+        entry = _cache.get(ip)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > CACHE_TTL:
+            del _cache[ip]
+            return None
+        _cache.move_to_end(ip)
+        return entry[1]
+
+
+def _store(ip, result):
+    with _cache_lock:
+        _cache[ip] = (time.time(), result)
+        _cache.move_to_end(ip)
+        while len(_cache) > MAX_CACHE:
+            _cache.popitem(last=False)
+
+
+def prefetch_threats(ips):
+    """Check uncached IPs in a background thread so get_cached_threat can serve them later"""
+    now = time.time()
+    with _pending_lock:
+        while _prefetched and now - _prefetched[0] > 60:
+            _prefetched.popleft()
+        budget = PREFETCH_PER_MINUTE - len(_prefetched)
+        todo = [ip for ip in dict.fromkeys(ips)
+                if ip not in _pending and get_cached_threat(ip) is None][:max(budget, 0)]
+        _pending.update(todo)
+        _prefetched.extend([now] * len(todo))
+    if not todo:
+        return
+
+    def run():
+        for ip in todo:
+            try:
+                check_ip_threat(ip)
+            finally:
+                with _pending_lock:
+                    _pending.discard(ip)
+
+    threading.Thread(target=run, daemon=True).start()
+
 
 def check_ip_threat(ip: str):
     result = {
@@ -30,8 +90,12 @@ def check_ip_threat(ip: str):
         result["virustotal_malicious"] = random.randint(0, 10)
         result["abuse_confidence"] = random.randint(0, 100)
         result["threat_score"] = 0.6 * result["virustotal_malicious"] + 0.4 * result["abuse_confidence"]
+        _store(ip, result)
         return result
 
+    # A failed call leaves a 0 in the result; don't cache that as "clean"
+    complete = True
+
     # 🔹 VirusTotal
     try:
         headers = {"x-apikey": VIRUSTOTAL_API_KEY}
@@ -40,7 +104,10 @@ def check_ip_threat(ip: str):
         if vt_resp.status_code == 200:
             data = vt_resp.json()
             result["virustotal_malicious"] = data["data"]["attributes"]["last_analysis_stats"]["malicious"]
+        else:
+            complete = False
     except Exception as e:
+        complete = False
         print("VirusTotal error:", e)
 
     # 🔹 AbuseIPDB
@@ -51,9 +118,14 @@ def check_ip_threat(ip: str):
         if ab_resp.status_code == 200:
             data = ab_resp.json()
             result["abuse_confidence"] = data["data"]["abuseConfidenceScore"]
+        else:
+            complete = False
     except Exception as e:
+        complete = False
         print("AbuseIPDB error:", e)
 
     # Combine
     result["threat_score"] = 0.6 * result["virustotal_malicious"] + 0.4 * result["abuse_confidence"]
+    if complete:
+        _store(ip, result)
     return result
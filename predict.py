@@ -1,9 +1,49 @@
+import os
+import threading
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
 from xai import explain_scores
+from reputation import score_dataframe
+from train_models import FEATURE_COLS
 
 DATA_PATH = "data/simulated_google_traffic.csv"
+LIVE_PATH = "data/live_traffic.csv"         # rows received via /ingest (git-ignored)
+LIVE_COLUMNS = ["timestamp", "src_ip", "dst_ip", "protocol", "length", "src_port", "dst_port"]
+MODEL_DIR = "models"
+RUNTIME_MODEL_DIR = "models/runtime"         # drift-triggered retrains (git-ignored)
+
+# Serving model + scaler, loaded once and swapped after a retrain
+_models = None
+_models_lock = threading.Lock()
+_live_lock = threading.Lock()
+
+
+def set_models(model, scaler):
+    """Make (model, scaler) the pair used by predict_all"""
+    global _models
+    with _models_lock:
+        _models = (model, scaler)
+
+
+def load_models(model_dir=None):
+    """
+    Load model.pkl / scaler.pkl written by train_models.
+    A runtime retrain (RUNTIME_MODEL_DIR) wins over the shipped models.
+    """
+    if model_dir is None:
+        runtime = os.path.join(RUNTIME_MODEL_DIR, "model.pkl")
+        model_dir = RUNTIME_MODEL_DIR if os.path.exists(runtime) else MODEL_DIR
+    model = joblib.load(os.path.join(model_dir, "model.pkl"))
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    set_models(model, scaler)
+    return model, scaler
+
+
+def get_models():
+    with _models_lock:
+        models = _models
+    return models if models is not None else load_models()
 
 
 def load_default_dataframe():
@@ -29,19 +69,53 @@ def load_default_dataframe():
         })
 
 
+def append_live_rows(records):
+    """
+    Append flow records (dicts with at least src_port, dst_port, length) to
+    LIVE_PATH. Missing timestamps are set to now.
+    Returns:
+        the appended rows as a DataFrame
+    """
+    df = pd.DataFrame.from_records(records)
+    missing = [c for c in FEATURE_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    df[FEATURE_COLS] = df[FEATURE_COLS].apply(pd.to_numeric, errors="raise")
+    if "timestamp" not in df.columns:
+        df["timestamp"] = pd.Timestamp.now()
+    df["timestamp"] = df["timestamp"].fillna(pd.Timestamp.now()).astype(str)
+    df = df.reindex(columns=LIVE_COLUMNS)
+
+    with _live_lock:
+        os.makedirs(os.path.dirname(LIVE_PATH) or ".", exist_ok=True)
+        df.to_csv(LIVE_PATH, mode="a", index=False, header=not os.path.exists(LIVE_PATH))
+    return df
+
+
+def load_stream_dataframe(n=200):
+    """Latest n rows: the base dataset followed by any ingested live rows"""
+    df = load_default_dataframe()
+    if os.path.exists(LIVE_PATH):
+        with _live_lock:
+            live = pd.read_csv(LIVE_PATH)
+        df = pd.concat([df, live], ignore_index=True).fillna(0)
+    return df.tail(n)
+
+
 def predict_all(df):
     if df.empty:
         return {}
 
     # ----- FEATURE EXTRACTION -----
-    feat_cols = [c for c in df.columns if c not in ["timestamp"]]
+    feat_cols = list(FEATURE_COLS)
     X = df[feat_cols].values
 
-    # ----- ISOLATION FOREST -----
-    iforest = IsolationForest(n_estimators=100, contamination=0.05, random_state=42)
-    iforest.fit(X)
-    scores = -iforest.score_samples(X)
-    preds = (scores > np.percentile(scores, 95)).astype(int)
+    # ----- TRAINED MODEL (loaded once, not refit per request) -----
+    # One-Class SVM from train_models; the "if" key below is kept for stream compatibility
+    model, scaler = get_models()
+    X_scaled = scaler.transform(X)
+    scores = -model.score_samples(X_scaled)
+    preds = np.where(model.predict(X_scaled) == -1, 1, 0)
 
     # ----- RANDOM CATEGORY LABELS -----
     possible_threats = ["DDoS", "SQL Injection", "Brute Force", "Normal"]
@@ -53,8 +127,13 @@ def predict_all(df):
             "score": round(np.random.uniform(0.7, 0.99), 2)
         })
 
+    # ----- LOCAL IP REPUTATION -----
+    # Only flagged rows are sent, as (row index, score) pairs
+    threat_scores = score_dataframe(df)
+    threat_index = np.flatnonzero(threat_scores)
+
     # ----- XAI -----
-    xai = explain_scores("if", X, scores)
+    xai = explain_scores("svm", X, scores)
 
     # ====================================================
     # 🔥 DENSITY HEATMAP (src_port vs length)
@@ -96,7 +175,12 @@ def predict_all(df):
         "categories": categories,
         "xai_proxy": xai,
         "features": feat_cols,
-        "heatmap": heatmap_data
+        "heatmap": heatmap_data,
+        "reputation": {
+            "threat_index": threat_index.tolist(),
+            "threat_score": threat_scores[threat_index].astype(int).tolist(),
+            "flagged": int(len(threat_index))
+        }
     }
 
 
@@ -0,0 +1,422 @@
+"""
+reputation.py — Local IP Reputation Index
+-----------------------------------------
+Matches flow IPs against large local threat feeds (IPs and CIDR ranges)
+without any network calls:
+- feeds are compiled into sorted, non-overlapping interval arrays
+  (uint32 for IPv4, (hi, lo) uint64 pairs for IPv6)
+- each build is a new versioned memory-mappable file; the shared index is
+  swapped to it before the previous file is removed (safe on Windows)
+- lookups are vectorized with np.searchsorted over a whole column
+and merges the local score with cached intel.py results (0–100).
+"""
+
+import heapq
+import ipaddress
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+from intel import get_cached_threat, prefetch_threats
+
+FEEDS_DIR = "data/feeds"
+INDEX_DIR = "data"
+
+MAGIC = b"IDSREP1\0"
+DEFAULT_SCORE = 100
+V4 = np.dtype("<u4")
+V6 = np.dtype([("hi", "<u8"), ("lo", "<u8")])
+_HEADER = 8 + 8 + 8   # magic, n4, n6
+
+_index = None
+_stale = []     # previous index files still waiting to be removed
+_lock = threading.Lock()
+
+
+# ----------------------------------------------------
+# Feed parsing / compilation
+# ----------------------------------------------------
+def parse_feed(path):
+    """
+    Read a feed file: one IP or CIDR per line, optional ",score" (0–100).
+    Blank lines, '#' comments and malformed entries or scores are skipped.
+    Returns:
+        v4, v6: lists of (start, end, score) tuples
+    """
+    v4, v6 = [], []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            entry, _, score = line.partition(",")
+            try:
+                net = ipaddress.ip_network(entry.strip(), strict=False)
+                score = int(score) if score.strip() else DEFAULT_SCORE
+            except ValueError:
+                continue
+            score = max(0, min(100, score))
+            start = int(net.network_address)
+            end = int(net.broadcast_address)
+            (v4 if net.version == 4 else v6).append((start, end, score))
+    return v4, v6
+
+
+def _segment(ranges):
+    """
+    Flatten (possibly overlapping) ranges into sorted, disjoint segments.
+    Where ranges overlap, the highest score wins.
+    """
+    if not ranges:
+        return []
+    ranges = sorted(ranges)
+
+    # Fast path — most feeds are plain IP lists with no overlaps
+    if all(ranges[i][1] < ranges[i + 1][0] for i in range(len(ranges) - 1)):
+        segments = ranges
+    else:
+        points = sorted({r[0] for r in ranges} | {r[1] + 1 for r in ranges})
+        segments, heap, i = [], [], 0
+        for k, point in enumerate(points[:-1]):
+            while i < len(ranges) and ranges[i][0] == point:
+                heapq.heappush(heap, (-ranges[i][2], ranges[i][1]))
+                i += 1
+            while heap and heap[0][1] < point:
+                heapq.heappop(heap)
+            if heap:
+                segments.append((point, points[k + 1] - 1, -heap[0][0]))
+
+    # Merge adjacent segments that carry the same score
+    merged = [list(segments[0])]
+    for start, end, score in segments[1:]:
+        last = merged[-1]
+        if start == last[1] + 1 and score == last[2]:
+            last[1] = end
+        else:
+            merged.append([start, end, score])
+    return merged
+
+
+def _v6_pairs(values):
+    arr = np.empty(len(values), dtype=V6)
+    arr["hi"] = [v >> 64 for v in values]
+    arr["lo"] = [v & 0xFFFFFFFFFFFFFFFF for v in values]
+    return arr
+
+
+def parse_ipv4(strings):
+    """
+    Vectorized strict dotted-quad parse (no whitespace or leading zeros,
+    same as ipaddress). Strings are viewed as a (n, 15) code-point matrix
+    and parsed one column at a time.
+    Returns:
+        ok: bool mask of valid IPv4 strings
+        ints: uint32 addresses (0 where not ok)
+    """
+    strings = pd.Series(strings, dtype=object).astype(str)
+    short = (strings.str.len() <= 15).values
+    n = len(strings)
+    ok = short.copy()
+    ints = np.zeros(n, dtype=np.uint32)
+    if not ok.any():
+        return ok, ints
+
+    chars = np.asarray(strings.values[short], dtype="U15").view(np.uint32).reshape(-1, 15)
+    m = len(chars)
+    valid = np.ones(m, dtype=bool)
+    ip = np.zeros(m, dtype=np.int64)
+    octet = np.zeros(m, dtype=np.int64)
+    digits = np.zeros(m, dtype=np.int64)
+    dots = np.zeros(m, dtype=np.int64)
+    lead_zero = np.zeros(m, dtype=bool)
+
+    def close(mask):
+        # Finish the current octet for rows in mask
+        good = (digits >= 1) & (octet <= 255) & ~(lead_zero & (digits > 1))
+        return valid & (~mask | good)
+
+    for j in range(15):
+        c = chars[:, j]
+        is_digit = (c >= 48) & (c <= 57)
+        is_dot = c == 46
+        valid &= is_digit | is_dot | (c == 0)
+
+        valid = close(is_dot)
+        ip = np.where(is_dot, ip * 256 + octet, ip)
+        dots += is_dot
+        lead_zero = np.where(is_dot, False, lead_zero | (is_digit & (digits == 0) & (c == 48)))
+        octet = np.where(is_dot, 0, np.where(is_digit, octet * 10 + (c.astype(np.int64) - 48), octet))
+        digits = np.where(is_dot, 0, digits + is_digit)
+
+    valid = close(np.ones(m, dtype=bool)) & (dots == 3)
+    ip = ip * 256 + octet
+
+    ok[short] = valid
+    ints[short] = np.where(valid, ip, 0).astype(np.uint32)
+    return ok, ints
+
+
+def compile_feeds(feed_paths, out_dir=INDEX_DIR):
+    """
+    Compile feed files into a new, uniquely named index file in out_dir.
+    Never overwrites an existing file, so concurrent builds and processes
+    mapping an older build don't interfere.
+    Returns:
+        path of the new file
+    """
+    v4, v6 = [], []
+    for path in feed_paths:
+        a, b = parse_feed(path)
+        v4.extend(a)
+        v6.extend(b)
+    v4, v6 = _segment(v4), _segment(v6)
+
+    v4_start = np.array([s[0] for s in v4], dtype=V4)
+    v4_end = np.array([s[1] for s in v4], dtype=V4)
+    v4_score = np.array([s[2] for s in v4], dtype=np.uint8)
+    v6_start = _v6_pairs([s[0] for s in v6])
+    v6_end = _v6_pairs([s[1] for s in v6])
+    v6_score = np.array([s[2] for s in v6], dtype=np.uint8)
+
+    os.makedirs(out_dir, exist_ok=True)
+    fd, out_path = tempfile.mkstemp(dir=out_dir, prefix="reputation.", suffix=".idx")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(np.array([len(v4), len(v6)], dtype="<u8").tobytes())
+        for arr in (v4_start, v4_end, v4_score):
+            fh.write(arr.tobytes())
+        fh.write(b"\0" * (-fh.tell() % 16))
+        for arr in (v6_start, v6_end, v6_score):
+            fh.write(arr.tobytes())
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    print(f"✓ Reputation index compiled: {len(v4)} IPv4 / {len(v6)} IPv6 ranges → {out_path}")
+    return out_path
+
+
+# ----------------------------------------------------
+# Index
+# ----------------------------------------------------
+class ReputationIndex:
+    """Sorted-interval index over IPv4/IPv6 ranges with vectorized lookup"""
+
+    def __init__(self, v4_start, v4_end, v4_score, v6_start, v6_end, v6_score, path=None):
+        self.path = path
+        self.v4_start, self.v4_end, self.v4_score = v4_start, v4_end, v4_score
+        self.v6_start, self.v6_end, self.v6_score = v6_start, v6_end, v6_score
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, V4), np.empty(0, V4), np.empty(0, np.uint8),
+                   np.empty(0, V6), np.empty(0, V6), np.empty(0, np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a compiled index file"""
+        with open(path, "rb") as fh:
+            header = fh.read(_HEADER)
+        if header[:8] != MAGIC:
+            raise ValueError(f"Not a reputation index: {path}")
+        n4, n6 = np.frombuffer(header[8:], dtype="<u8").tolist()
+
+        def view(dtype, count, offset):
+            if count == 0:
+                return np.empty(0, dtype)
+            return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+        off = _HEADER
+        v4_start = view(V4, n4, off); off += n4 * V4.itemsize
+        v4_end = view(V4, n4, off); off += n4 * V4.itemsize
+        v4_score = view(np.uint8, n4, off); off += n4
+        off += -off % 16
+        v6_start = view(V6, n6, off); off += n6 * V6.itemsize
+        v6_end = view(V6, n6, off); off += n6 * V6.itemsize
+        v6_score = view(np.uint8, n6, off)
+        return cls(v4_start, v4_end, v4_score, v6_start, v6_end, v6_score, path=path)
+
+    def __len__(self):
+        return len(self.v4_start) + len(self.v6_start)
+
+    @staticmethod
+    def _match(starts, ends, scores, q):
+        if len(starts) == 0:
+            return np.zeros(len(q), dtype=np.uint8)
+        idx = np.searchsorted(starts, q, side="right") - 1
+        safe = np.maximum(idx, 0)
+        end = ends[safe]
+        if q.dtype == V6:
+            within = (q["hi"] < end["hi"]) | ((q["hi"] == end["hi"]) & (q["lo"] <= end["lo"]))
+        else:
+            within = q <= end
+        hit = (idx >= 0) & within
+        return np.where(hit, scores[safe], 0).astype(np.uint8)
+
+    def lookup_v4(self, ints):
+        """Scores for an array of IPv4 addresses given as integers"""
+        return self._match(self.v4_start, self.v4_end, self.v4_score,
+                           np.asarray(ints, dtype=V4))
+
+    def lookup_v6(self, pairs):
+        """Scores for an array of IPv6 addresses given as V6 (hi, lo) pairs"""
+        return self._match(self.v6_start, self.v6_end, self.v6_score, pairs)
+
+    def lookup(self, ips):
+        """
+        Scores for a column of IP strings (0 = not listed).
+        Each distinct address is parsed once: dotted quads in one vectorized
+        pass, anything else (IPv6, whitespace, junk) through ipaddress.
+        """
+        codes, uniques = pd.factorize(pd.Series(ips), use_na_sentinel=True)
+        fast_ok, fast_ints = parse_ipv4(uniques)
+        v4_pos, v4_ints, v6_pos, v6_ints = [], [], [], []
+        for i in np.flatnonzero(~fast_ok):
+            ip = uniques[i]
+            try:
+                addr = ipaddress.ip_address(str(ip).strip())
+            except ValueError:
+                continue
+            # ::ffff:a.b.c.d is matched against the IPv4 ranges
+            if addr.version == 6 and addr.ipv4_mapped:
+                addr = addr.ipv4_mapped
+            if addr.version == 4:
+                v4_pos.append(i)
+                v4_ints.append(int(addr))
+            else:
+                v6_pos.append(i)
+                v6_ints.append(int(addr))
+
+        unique_scores = np.zeros(len(uniques) + 1, dtype=np.uint8)
+        unique_scores[:-1][fast_ok] = self.lookup_v4(fast_ints[fast_ok])
+        if v4_pos:
+            unique_scores[v4_pos] = self.lookup_v4(v4_ints)
+        if v6_pos:
+            unique_scores[v6_pos] = self.lookup_v6(_v6_pairs(v6_ints))
+        # codes == -1 (missing) land on the trailing zero slot
+        return unique_scores[codes]
+
+
+# ----------------------------------------------------
+# Shared index (atomic reload)
+# ----------------------------------------------------
+def _remove_stale():
+    # On Windows a file still mapped by an in-flight request can't be removed yet
+    for path in list(_stale):
+        try:
+            os.remove(path)
+            _stale.remove(path)
+        except FileNotFoundError:
+            _stale.remove(path)
+        except OSError:
+            pass
+
+
+def reload_index(feeds_dir=FEEDS_DIR, out_dir=INDEX_DIR):
+    """
+    Compile feeds into a new index file, load it, swap the shared index,
+    and only then remove the previous file.
+    Readers holding the old index keep using it until they finish.
+    """
+    global _index
+    with _lock:
+        feeds = []
+        if os.path.isdir(feeds_dir):
+            feeds = sorted(
+                path for path in (os.path.join(feeds_dir, f) for f in os.listdir(feeds_dir))
+                if os.path.isfile(path) and not os.path.basename(path).startswith(".")
+            )
+        if feeds:
+            path = compile_feeds(feeds, out_dir)
+            try:
+                index = ReputationIndex.load(path)
+            except Exception:
+                os.remove(path)
+                raise
+        else:
+            index = ReputationIndex.empty()
+
+        previous, _index = _index, index
+        if previous is not None and previous.path:
+            _stale.append(previous.path)
+        del previous
+        _remove_stale()
+    return index
+
+
+def get_index():
+    if _index is None:
+        return reload_index()
+    return _index
+
+
+def score_dataframe(df, cols=("src_ip", "dst_ip")):
+    """
+    Per-flow threat score (0–100): the worst of the local feed matches for
+    each IP column and any cached intel.py result for those IPs.
+    IPs flagged locally but not yet in the intel cache are checked in the
+    background, so their remote score shows up on a later call.
+    """
+    index = get_index()
+    threat = np.zeros(len(df), dtype=float)
+    for col in cols:
+        if col not in df.columns:
+            continue
+        # Score each distinct IP once: local feed match, then cached remote reputation
+        codes, uniques = pd.factorize(df[col])
+        local = index.lookup(uniques.astype(str))
+        remote = np.zeros(len(uniques))
+        unchecked = []
+        for i, ip in enumerate(uniques):
+            cached = get_cached_threat(str(ip))
+            if cached:
+                remote[i] = min(100.0, cached["threat_score"])
+            elif local[i] > 0:
+                unchecked.append(str(ip))
+        # codes == -1 (missing) land on the trailing zero slot
+        per_ip = np.append(np.maximum(local, remote), 0)
+        threat = np.maximum(threat, per_ip[codes])
+        prefetch_threats(unchecked)
+    return threat
+
+
+if __name__ == "__main__":
+    # Benchmark on a synthetic feed
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(42)
+    n_ranges, n_lookups = 300_000, 2_000_000
+
+    tmp = tempfile.mkdtemp()
+    feed_path = os.path.join(tmp, "feed.txt")
+    with open(feed_path, "w") as fh:
+        for ip, plen in zip(rng.integers(0, 2**32, n_ranges), rng.choice([32, 32, 32, 28, 24], n_ranges)):
+            fh.write(f"{ipaddress.IPv4Address(int(ip))}/{plen},{rng.integers(1, 101)}\n")
+
+    t0 = time.perf_counter()
+    path = compile_feeds([feed_path], tmp)
+    print(f"  Compile: {time.perf_counter() - t0:.2f}s")
+
+    index = ReputationIndex.load(path)
+    q = rng.integers(0, 2**32, n_lookups, dtype=np.uint32)
+    t0 = time.perf_counter()
+    scores = index.lookup_v4(q)
+    dt = time.perf_counter() - t0
+    print(f"  Integer lookups: {n_lookups / dt / 1e6:.1f} M/s ({(scores > 0).mean() * 100:.1f}% listed)")
+
+    ips = pd.Series([str(ipaddress.IPv4Address(int(x))) for x in rng.choice(q, 5_000)])
+    column = ips.sample(n_lookups, replace=True, random_state=42).values
+    t0 = time.perf_counter()
+    index.lookup(column)
+    dt = time.perf_counter() - t0
+    print(f"  String column lookups (5k distinct IPs): {n_lookups / dt / 1e6:.1f} M/s")
+
+    # High cardinality: every unique has to be parsed, so this measures the parse
+    n_distinct = 500_000
+    column = np.array([str(ipaddress.IPv4Address(int(x))) for x in q[:n_distinct]], dtype=object)
+    t0 = time.perf_counter()
+    index.lookup(column)
+    dt = time.perf_counter() - t0
+    print(f"  String column lookups ({n_distinct // 1000}k distinct IPs): {n_distinct / dt / 1e6:.2f} M/s")
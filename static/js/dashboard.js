@@ -1,47 +1,78 @@
 let lineChart, pieChart, agreeChart, xaiChart;
 let historyScores = [];
-let heatmapChart;
+let heatmapChart, driftChart;
 
 const scoreCtx = () => document.getElementById("scoreLine").getContext("2d");
 const pieCtx = () => document.getElementById("threatPie").getContext("2d");
 const agreeCtx = () => document.getElementById("agreementBar").getContext("2d");
 const xaiCtx = () => document.getElementById("xaiBar").getContext("2d");
 const heatmapCtx = () => document.getElementById("heatmap").getContext("2d");
+const driftCtx = () => document.getElementById("driftBar").getContext("2d");
 
 function ensureChart(instance, type, ctx, data, options) {
     if (instance) instance.destroy();
     return new Chart(ctx, { type, data, options });
 }
 
-// Temporary mock data generator (for testing)
+// === Compact /predict-stream decoding ===
+// Layout: "IDSB" | uint32 header length | JSON header | 4-byte aligned little-endian arrays
+const STREAM_MIME = "application/x-ids-stream";
+
+function decodeStream(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== "IDSB") throw new Error("Bad stream magic: " + magic);
+    const headerLen = view.getUint32(4, true);
+    const out = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLen)));
+    const base = 8 + headerLen;
+
+    const arrays = {};
+    for (const { name, dtype, offset, length } of out.arrays) {
+        const at = base + offset;
+        if (dtype === "f4") arrays[name] = new Float32Array(buffer, at, length);
+        else if (dtype === "u4") arrays[name] = new Uint32Array(buffer, at, length);
+        else if (dtype === "u1") arrays[name] = new Uint8Array(buffer, at, length);
+        else if (dtype === "bits") {
+            // One bit per row, least significant bit first
+            const bytes = new Uint8Array(buffer, at, Math.ceil(length / 8));
+            arrays[name] = Uint8Array.from({ length }, (_, i) => (bytes[i >> 3] >> (i & 7)) & 1);
+        }
+    }
+
+    // Labels arrive either as a bitset or as anomaly row indices; expose both
+    let labels = arrays.labels, anomalyIndex = arrays.anomaly_index;
+    if (labels) {
+        anomalyIndex = Uint32Array.from(labels.reduce((acc, v, i) => (v && acc.push(i), acc), []));
+    } else {
+        labels = new Uint8Array(out.n);
+        for (const i of anomalyIndex || []) labels[i] = 1;
+    }
+    out.if = { scores: Array.from(arrays.scores || []), index: arrays.score_index, labels, anomaly_index: anomalyIndex };
+    out.normal = arrays.normal;
+    out.anomaly = arrays.anomaly;
+    if (arrays.threat_index) {
+        out.reputation.threat_index = arrays.threat_index;
+        out.reputation.threat_score = arrays.threat_score;
+    }
+    return out;
+}
+
 async function refresh() {
     try {
-        const scores = Array.from({ length: 50 }, () => Math.random());
-        const categories = [
-            { label: "DDoS", score: Math.random() },
-            { label: "SQL Injection", score: Math.random() },
-            { label: "Brute Force", score: Math.random() },
-        ];
-
-        const out = {
-            if: { scores },
-            categories,
-            xai_proxy: { feature_importances: [0.4, 0.25, 0.35] },
-            features: ["src_port", "dst_port", "length"],
-        };
-
-        updateScoreLine(out.if.scores);
+        // Ask for the score series downsampled to the chart's pixel width
+        const width = document.getElementById("scoreLine").clientWidth || 800;
+        const res = await fetch(`/predict-stream?points=${width}`, { headers: { Accept: STREAM_MIME } });
+        const out = (res.headers.get("Content-Type") || "").startsWith(STREAM_MIME)
+            ? decodeStream(await res.arrayBuffer())
+            : await res.json();
+        if (out.error) throw new Error(out.error);
+
+        updateScoreLine(out.if.scores, out.if.index);
         updateThreatPie(out.categories);
         updateAgreement(out);
         updateXAI(out);
-        const heatmapData = [];
-        for (let i = 0; i < 10; i++) {
-            for (let j = 0; j < 10; j++) {
-                heatmapData.push({ x: i, y: j, v: Math.random() * 100 });
-            }
-        }
-        out.heatmap = heatmapData;
         updateHeatmap(out.heatmap);
+        if (out.drift) updateDrift(out.drift);
 
         const timeEl = document.getElementById("lastUpdate");
         if (timeEl) timeEl.textContent = "Last update: " + new Date().toLocaleTimeString();
@@ -51,12 +82,13 @@ async function refresh() {
     }
 }
 
-function updateScoreLine(scores) {
+function updateScoreLine(scores, index) {
     historyScores = scores;
-    const labels = scores.map((_, i) => i + 1);
+    // Downsampled series carry their original row positions
+    const labels = index ? Array.from(index, i => i + 1) : scores.map((_, i) => i + 1);
     lineChart = ensureChart(lineChart, "line", scoreCtx(), {
         labels,
-        datasets: [{ label: "Anomaly Score (IF)", data: scores, borderWidth: 2, tension: 0.3 }]
+        datasets: [{ label: "Anomaly Score (One-Class SVM)", data: scores, borderWidth: 2, tension: 0.3 }]
     }, { responsive: true, animation: false });
 }
 
@@ -110,6 +142,29 @@ async function loadGeminiSummary() {
         document.getElementById("aiSummary").innerHTML = "Failed to load AI summary.";
     }
 }
+// === Drift Monitor (scores arrive with each /predict-stream refresh) ===
+function updateDrift(out) {
+    const feats = Object.keys(out.features || {});
+    const psi = feats.map(f => out.features[f].psi);
+    const ks = feats.map(f => out.features[f].ks);
+    driftChart = ensureChart(driftChart, "bar", driftCtx(), {
+        labels: feats,
+        datasets: [
+            { label: "PSI", data: psi },
+            { label: "KS", data: ks }
+        ]
+    }, { responsive: true, animation: false, scales: { y: { beginAtZero: true } } });
+
+    const statusEl = document.getElementById("driftStatus");
+    if (statusEl) {
+        statusEl.textContent = out.retraining ? "Drift detected — retraining..."
+            : !out.live_rows ? "Waiting for new traffic (POST /ingest)"
+            : out.warming_up ? `Warming up: ${Math.round(out.live_count)}/${out.min_live_rows} live rows`
+            : out.drifted ? "Drift detected"
+            : `Stable (PSI < ${out.psi_threshold}) · retrains: ${out.retrain_count}`;
+    }
+}
+
 // === Heatmap Update Function ===
 function updateHeatmap(data) {
   const maxValue = Math.max(...data.map(d => d.v));
@@ -153,3 +208,4 @@ toggleAuto(true);
 refresh();
 setInterval(loadGeminiSummary, 15000);
 loadGeminiSummary();
+
@@ -0,0 +1,181 @@
+"""
+stream_codec.py — Compact /predict-stream Encoding
+--------------------------------------------------
+Binary layout (all little-endian):
+    4 bytes   magic b"IDSB"
+    uint32    length of the JSON header
+    JSON      header: small fields + table of {name, dtype, offset, length}
+    padding   to a 4-byte boundary
+    arrays    typed arrays at 4-byte aligned offsets from the data start
+Scores are float32. Labels travel as whichever is smaller for the response:
+a little-endian bitset ("bits", one bit per row) when more than 1/32 of rows
+are anomalies, otherwise the uint32 row indices of the anomalies. Reputation
+travels as (uint32 row index, uint8 score) pairs for flagged rows only.
+The score series can be downsampled with LTTB to the chart's pixel width.
+"""
+
+import json
+import numpy as np
+
+MAGIC = b"IDSB"
+MIMETYPE = "application/x-ids-stream"
+
+
+def lttb(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling over x = 0..len(y)-1
+    Returns:
+        indices of the kept points (first and last always included)
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    x = np.arange(n, dtype=float)
+    # Per-bucket averages (plus the last point as the final "next bucket")
+    sizes = np.diff(np.append(edges, n))
+    avg_y = np.add.reduceat(y, edges) / sizes
+    avg_x = edges + (sizes - 1) / 2.0
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i + 1] - ay))
+        a = lo + area.argmax()
+        keep[i + 1] = a
+    return keep
+
+
+def _sample(values, max_points):
+    """Uniform stride sample for distribution-only series"""
+    if max_points is None or len(values) <= max_points:
+        return values
+    return values[np.linspace(0, len(values) - 1, max_points).astype(int)]
+
+
+def trim_output(out, max_points=None):
+    """
+    Downsample the heavy series of a predict_all() result.
+    Returns:
+        (out, arrays): out without the heavy series, arrays as numpy
+    """
+    if max_points is not None and max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    out = dict(out)
+    model = dict(out.pop("if", {}))
+    scores = np.asarray(model.pop("scores", []), dtype=np.float32)
+    labels = np.asarray(model.pop("labels", []), dtype=np.uint8)
+
+    # A bitset costs n/8 bytes, the index list 4 bytes per anomaly
+    if len(labels) and labels.mean() > 1 / 32:
+        arrays = {"labels": labels.astype(bool)}
+    else:
+        arrays = {"anomaly_index": np.flatnonzero(labels).astype(np.uint32)}
+    if max_points is not None and len(scores) > max_points:
+        idx = lttb(scores, max_points)
+        arrays["scores"] = scores[idx]
+        arrays["score_index"] = idx.astype(np.uint32)
+    else:
+        arrays["scores"] = scores
+
+    arrays["normal"] = _sample(np.asarray(out.pop("normal", []), dtype=np.float32), max_points)
+    arrays["anomaly"] = _sample(np.asarray(out.pop("anomaly", []), dtype=np.float32), max_points)
+
+    reputation = dict(out.pop("reputation", {}))
+    if "threat_index" in reputation:
+        arrays["threat_index"] = np.asarray(reputation.pop("threat_index"), dtype=np.uint32)
+        arrays["threat_score"] = np.clip(reputation.pop("threat_score"), 0, 100).astype(np.uint8)
+    out["reputation"] = reputation
+    out["n"] = int(len(scores))
+    return out, arrays
+
+
+def encode_json(out, max_points=None):
+    """predict_all() result as a JSON-ready dict, with optional downsampling"""
+    if max_points is None:
+        return out
+    meta, arrays = trim_output(out, max_points)
+    # Round so float32 noise doesn't bloat the text
+    scores = np.round(arrays["scores"].astype(float), 5)
+    # In JSON text the index list stays smaller than a 0/1 list even at high rates
+    anomaly_index = arrays["anomaly_index"] if "anomaly_index" in arrays else np.flatnonzero(arrays["labels"])
+    meta["if"] = {"scores": scores.tolist(), "anomaly_index": anomaly_index.tolist()}
+    if "score_index" in arrays:
+        meta["if"]["index"] = arrays["score_index"].tolist()
+    meta["normal"] = np.round(arrays["normal"].astype(float), 5).tolist()
+    meta["anomaly"] = np.round(arrays["anomaly"].astype(float), 5).tolist()
+    if "threat_index" in arrays:
+        meta["reputation"]["threat_index"] = arrays["threat_index"].tolist()
+        meta["reputation"]["threat_score"] = arrays["threat_score"].tolist()
+    return meta
+
+
+def encode_binary(out, max_points=None):
+    """predict_all() result as the compact binary payload"""
+    meta, arrays = trim_output(out, max_points)
+
+    blobs, table, offset = [], [], 0
+    for name, arr in arrays.items():
+        if arr.dtype == bool:
+            dtype, raw = "bits", np.packbits(arr, bitorder="little").tobytes()
+        else:
+            data = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+            dtype = {"f": "f4", "u": "u%d" % data.itemsize}[data.dtype.kind]
+            raw = data.tobytes()
+        table.append({"name": name, "dtype": dtype, "offset": offset, "length": int(len(arr))})
+        raw += b"\0" * (-len(raw) % 4)
+        blobs.append(raw)
+        offset += len(raw)
+
+    meta["arrays"] = table
+    header = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    header += b" " * (-(8 + len(header)) % 4)
+    return b"".join([MAGIC, np.uint32(len(header)).astype("<u4").tobytes(), header] + blobs)
+
+
+if __name__ == "__main__":
+    # Benchmark: bytes and encode time per response
+    import time
+
+    rng = np.random.default_rng(42)
+
+    def fake_output(n, rate):
+        scores = rng.random(n)
+        labels = (scores > 1 - rate).astype(int)
+        lengths = rng.integers(40, 1500, n)
+        threat = np.flatnonzero(rng.random(n) < 0.01)
+        return {
+            "if": {"scores": scores.tolist(), "labels": labels.tolist()},
+            "normal": lengths[labels == 0].tolist(),
+            "anomaly": lengths[labels == 1].tolist(),
+            "categories": [{"label": "DDoS", "score": 0.9}] * 10,
+            "xai_proxy": {"feature_importances": [0.3, 0.3, 0.4]},
+            "features": ["length", "src_port", "dst_port"],
+            "heatmap": [{"x": i, "y": j, "v": 1} for i in range(20) for j in range(20)],
+            "reputation": {"threat_index": threat.tolist(), "threat_score": [80] * len(threat),
+                           "flagged": len(threat)},
+        }
+
+    def bench(fn, reps=20):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            payload = fn()
+        return len(payload), (time.perf_counter() - t0) / reps * 1000
+
+    # 14% is the served One-Class SVM's rate on the demo data (28 of 200 rows)
+    print(f"{'rows':>8} {'anomalies':>9} {'format':<14} {'bytes':>10} {'encode ms':>10}")
+    for n, rate in [(n, r) for n in (200, 10_000, 100_000) for r in (0.14, 0.01)]:
+        out = fake_output(n, rate)
+        for name, fn in [
+            ("json", lambda: json.dumps(out).encode()),
+            ("json+lttb800", lambda: json.dumps(encode_json(out, 800)).encode()),
+            ("binary", lambda: encode_binary(out)),
+            ("binary+lttb800", lambda: encode_binary(out, 800)),
+        ]:
+            size, ms = bench(fn)
+            print(f"{n:>8} {rate:>9.0%} {name:<14} {size:>10} {ms:>10.2f}")
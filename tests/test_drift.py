@@ -0,0 +1,112 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from drift import PSI_THRESHOLD, DriftMonitor, FeatureSketch
+
+DATA_PATH = "data/simulated_google_traffic.csv"
+
+
+def frame(n, start, seed=0, length_scale=1.0, src_port=None):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="s").astype(str),
+        "length": rng.integers(40, 1500, n) * length_scale,
+        "src_port": rng.integers(1024, 65535, n) if src_port is None else src_port,
+        "dst_port": rng.choice([80, 443], n),
+    })
+
+
+class StubRetrain:
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def __call__(self, df):
+        self.calls.append(len(df))
+        self.done.set()
+
+
+def test_sketch_identical_distribution_scores_near_zero():
+    rng = np.random.default_rng(1)
+    sketch = FeatureSketch(rng.normal(size=20000))
+    sketch.update(rng.normal(size=20000))
+    psi, ks = sketch.scores()
+    assert psi < 0.01
+    assert ks < 0.02
+
+
+def test_sketch_shifted_distribution_crosses_threshold():
+    rng = np.random.default_rng(2)
+    sketch = FeatureSketch(rng.normal(size=20000))
+    sketch.update(rng.normal(loc=1.5, size=20000))
+    psi, ks = sketch.scores()
+    assert psi > PSI_THRESHOLD
+    assert ks > 0.3
+
+
+def test_repeated_polls_are_not_double_counted():
+    monitor = DriftMonitor().fit_reference(frame(2000, "2025-01-01"))
+    batch = frame(300, "2025-02-01", seed=3)
+    first = monitor.update(batch)
+    again = monitor.update(batch)
+    assert first["live_rows"] == again["live_rows"] == 300
+    assert again["live_count"] == first["live_count"]
+
+
+def test_reference_rows_are_never_live():
+    ref = frame(2000, "2025-01-01")
+    monitor = DriftMonitor().fit_reference(ref)
+    assert monitor.update(ref.tail(200))["live_rows"] == 0
+
+
+def test_small_sample_from_reference_does_not_drift():
+    # Rows taken from the training CSV itself, re-stamped as new, 5 per batch
+    ref = pd.read_csv(DATA_PATH)
+    stub = StubRetrain()
+    monitor = DriftMonitor(retrain_fn=stub, cooldown=0).fit_reference(ref)
+    rows = ref.sample(400, replace=True, random_state=0).reset_index(drop=True)
+    rows["timestamp"] = pd.date_range("2030-01-01", periods=len(rows), freq="s").astype(str)
+
+    warm = []
+    for i in range(0, len(rows), 5):
+        status = monitor.update(rows.iloc[i:i + 5])
+        assert not status["drifted"]
+        warm.append(not status["warming_up"])
+    assert warm[0] is False and warm[-1] is True
+    assert stub.calls == []
+
+
+def test_trickle_builds_a_live_window():
+    monitor = DriftMonitor().fit_reference(frame(2000, "2025-01-01"))
+    status = None
+    for i in range(100):
+        status = monitor.update(frame(5, pd.Timestamp("2025-02-01") + pd.Timedelta(minutes=i), seed=i))
+    # Row-based decay keeps almost all 500 trickled rows in the window
+    assert status["live_count"] > 450
+    assert not status["warming_up"]
+
+
+def test_drift_triggers_retrain_then_cooldown():
+    stub = StubRetrain()
+    monitor = DriftMonitor(retrain_fn=stub, cooldown=3600).fit_reference(frame(2000, "2025-01-01"))
+
+    shifted = frame(500, "2025-02-01", seed=4, length_scale=6, src_port=80)
+    assert monitor.update(shifted)["drifted"]
+    assert stub.done.wait(5)
+    deadline = time.time() + 5
+    while monitor.status()["retraining"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert stub.calls == [2500]           # reference + drifted batch
+
+    status = monitor.status()
+    assert status["retrain_count"] == 1
+    assert not status["drifted"]           # cleared once the reference was rebuilt
+    assert status["features"]              # last scores kept for the chart
+
+    # Still drifting against the rebuilt reference, but inside the cooldown
+    more = frame(500, "2025-03-01", seed=5, length_scale=20, src_port=81)
+    assert monitor.update(more)["drifted"]
+    assert stub.calls == [2500]
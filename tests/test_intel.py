@@ -0,0 +1,71 @@
+import pytest
+
+import intel
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+VT_OK = FakeResponse(200, {"data": {"attributes": {"last_analysis_stats": {"malicious": 5}}}})
+ABUSE_OK = FakeResponse(200, {"data": {"abuseConfidenceScore": 50}})
+
+
+class NoThread:
+    """Keeps prefetched IPs pending instead of calling the APIs"""
+    def __init__(self, **kwargs):
+        pass
+
+    def start(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(intel, "_cache", type(intel._cache)())
+    monkeypatch.setattr(intel, "_prefetched", type(intel._prefetched)())
+    monkeypatch.setattr(intel, "_pending", set())
+    monkeypatch.setattr(intel.threading, "Thread", NoThread)
+
+
+def fake_get(vt, abuse):
+    def get(url, **kwargs):
+        if isinstance(vt, Exception) and "virustotal" in url:
+            raise vt
+        return vt if "virustotal" in url else abuse
+    return get
+
+
+def test_successful_check_is_cached(monkeypatch):
+    monkeypatch.setattr(intel.requests, "get", fake_get(VT_OK, ABUSE_OK))
+    result = intel.check_ip_threat("1.2.3.4")
+    assert result["threat_score"] == pytest.approx(0.6 * 5 + 0.4 * 50)
+    assert intel.get_cached_threat("1.2.3.4") == result
+
+
+@pytest.mark.parametrize("vt", [FakeResponse(429), ConnectionError("down")])
+def test_failed_check_is_not_cached_as_clean(monkeypatch, vt):
+    monkeypatch.setattr(intel.requests, "get", fake_get(vt, ABUSE_OK))
+    intel.check_ip_threat("1.2.3.4")
+    assert intel.get_cached_threat("1.2.3.4") is None
+
+
+def test_cache_is_bounded_lru(monkeypatch):
+    monkeypatch.setattr(intel, "MAX_CACHE", 3)
+    for ip in ["a", "b", "c"]:
+        intel._store(ip, {"ip": ip})
+    intel.get_cached_threat("a")            # a becomes most recently used
+    intel._store("d", {"ip": "d"})
+    assert list(intel._cache) == ["c", "a", "d"]
+
+
+def test_prefetch_is_rate_limited():
+    intel.prefetch_threats([f"10.0.0.{i}" for i in range(10)])
+    assert len(intel._pending) == intel.PREFETCH_PER_MINUTE
+    intel.prefetch_threats([f"10.0.1.{i}" for i in range(10)])
+    assert len(intel._pending) == intel.PREFETCH_PER_MINUTE
@@ -0,0 +1,97 @@
+import ipaddress
+import os
+
+import numpy as np
+
+import reputation
+from reputation import ReputationIndex, _segment, compile_feeds, parse_ipv4
+
+
+def build(tmp_path, lines):
+    feed = tmp_path / "feed.txt"
+    feed.write_text("\n".join(lines) + "\n")
+    return ReputationIndex.load(compile_feeds([str(feed)], str(tmp_path)))
+
+
+def test_segment_overlap_highest_score_wins():
+    # /24 with score 20, a /30 inside it with 90, and an adjacent range with 20
+    ranges = [(0, 255, 20), (4, 7, 90), (256, 300, 20)]
+    assert _segment(ranges) == [[0, 3, 20], [4, 7, 90], [8, 300, 20]]
+
+
+def test_segment_nested_lower_score_does_not_override():
+    assert _segment([(0, 255, 90), (10, 20, 5)]) == [[0, 255, 90]]
+
+
+def test_lookup_ipv4_boundaries_and_bad_input(tmp_path):
+    index = build(tmp_path, ["# comment", "10.0.0.0/24,20", "10.0.0.4/30,90", "bogus", "5.6.7.8"])
+    ips = ["10.0.0.0", "10.0.0.3", "10.0.0.4", "10.0.0.7", "10.0.0.8",
+           "10.0.0.255", "10.0.1.0", "9.255.255.255", "5.6.7.8", "::ffff:5.6.7.8",
+           "garbage", None]
+    assert index.lookup(ips).tolist() == [20, 20, 90, 90, 20, 20, 0, 0, 100, 100, 0, 0]
+
+
+def test_parse_ipv4_matches_ipaddress():
+    cases = ["1.2.3.4", "0.0.0.0", "255.255.255.255", "256.1.1.1", "01.2.3.4",
+             "1.2.3.04", "1.2.3", "1.2.3.4.5", " 1.2.3.4", "1.2.3.4 ", "1..2.3",
+             "1.2.3.", ".1.2.3", "1234.1.1.1", "::ffff:1.2.3.4", "abc", "", "10.0.0.0"]
+    ok, ints = parse_ipv4(cases)
+    for s, got_ok, got in zip(cases, ok, ints):
+        try:
+            expected = (True, int(ipaddress.IPv4Address(s)))
+        except ValueError:
+            expected = (False, 0)
+        assert (bool(got_ok), int(got)) == expected, s
+
+
+def test_lookup_falls_back_for_non_dotted_quads(tmp_path):
+    index = build(tmp_path, ["10.0.0.0/8,70"])
+    scores = index.lookup(["10.1.2.3", " 10.1.2.3 ", "::ffff:10.1.2.3", "010.1.2.3", "11.0.0.1"])
+    assert scores.tolist() == [70, 70, 70, 0, 0]
+
+
+def test_lookup_ipv6_only_index(tmp_path):
+    index = build(tmp_path, ["2001:db8::/64,30", "2001:db8:0:1::/127,80"])
+    assert len(index.v4_start) == 0
+    ips = ["2001:db8::", "2001:db8::ffff:ffff:ffff:ffff", "2001:db8:0:1::",
+           "2001:db8:0:1::1", "2001:db8:0:1::2", "2001:db7:ffff:ffff:ffff:ffff:ffff:ffff",
+           "1.2.3.4"]
+    assert index.lookup(ips).tolist() == [30, 30, 80, 80, 0, 0, 0]
+
+
+def test_lookup_ipv6_across_64_bit_boundary(tmp_path):
+    # Range whose low 64 bits wrap into the next high word
+    index = build(tmp_path, ["2001:db8::ffff:ffff:ffff:fffe/127,50", "2001:db8:0:1::/128,60"])
+    ips = ["2001:db8::ffff:ffff:ffff:fffe", "2001:db8::ffff:ffff:ffff:ffff",
+           "2001:db8:0:1::", "2001:db8:0:1::1"]
+    assert index.lookup(ips).tolist() == [50, 50, 60, 0]
+
+
+def test_empty_index(tmp_path):
+    for index in (ReputationIndex.empty(), build(tmp_path, ["# nothing listed"])):
+        assert len(index) == 0
+        assert index.lookup(["1.2.3.4", "::1"]).tolist() == [0, 0]
+        assert index.lookup_v4(np.array([1, 2], dtype=np.uint32)).tolist() == [0, 0]
+
+
+def test_reload_swaps_then_removes_previous_file(tmp_path):
+    feeds = tmp_path / "feeds"
+    feeds.mkdir()
+    (feeds / "a.txt").write_text("1.2.3.4,70\n")
+
+    first = reputation.reload_index(str(feeds), str(tmp_path))
+    second = reputation.reload_index(str(feeds), str(tmp_path))
+    assert first.path != second.path
+    assert not os.path.exists(first.path)
+    assert os.path.exists(second.path)
+    assert second.lookup(["1.2.3.4"]).tolist() == [70]
+
+
+def test_malformed_scores_and_subdirectories_are_skipped(tmp_path):
+    feeds = tmp_path / "feeds"
+    feeds.mkdir()
+    (feeds / "archive").mkdir()
+    (feeds / "a.txt").write_text("1.2.3.4,high\n1.2.3.5,50.5\n1.2.3.6,40\n1.2.3.7\n")
+
+    index = reputation.reload_index(str(feeds), str(tmp_path))
+    assert index.lookup(["1.2.3.4", "1.2.3.5", "1.2.3.6", "1.2.3.7"]).tolist() == [0, 0, 40, 100]
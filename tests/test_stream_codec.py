@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+
+from stream_codec import MAGIC, encode_binary, encode_json, lttb, trim_output
+
+
+def decode(payload):
+    """Python mirror of decodeStream() in static/js/dashboard.js"""
+    assert payload[:4] == MAGIC
+    header_len = int(np.frombuffer(payload[4:8], dtype="<u4")[0])
+    base = 8 + header_len
+    assert base % 4 == 0
+    meta = json.loads(payload[8:base])
+    arrays = {}
+    for entry in meta["arrays"]:
+        assert entry["offset"] % 4 == 0
+        start = base + entry["offset"]
+        if entry["dtype"] == "bits":
+            packed = np.frombuffer(payload, dtype=np.uint8, count=-(-entry["length"] // 8), offset=start)
+            arrays[entry["name"]] = np.unpackbits(packed, count=entry["length"], bitorder="little")
+            continue
+        dtype = np.dtype("<" + entry["dtype"])
+        arrays[entry["name"]] = np.frombuffer(payload, dtype=dtype, count=entry["length"], offset=start)
+    return meta, arrays
+
+
+def make_output(n, seed=0, rate=0.1):
+    rng = np.random.default_rng(seed)
+    scores = rng.random(n)
+    labels = (scores > 1 - rate).astype(int)
+    threat = np.arange(0, n, 7)
+    return {
+        "if": {"scores": scores.tolist(), "labels": labels.tolist()},
+        "normal": rng.integers(40, 1500, int((labels == 0).sum())).tolist(),
+        "anomaly": rng.integers(40, 1500, int(labels.sum())).tolist(),
+        "features": ["src_port", "dst_port", "length"],
+        "reputation": {"threat_index": threat.tolist(), "threat_score": [55] * len(threat),
+                       "flagged": len(threat)},
+    }
+
+
+def test_lttb_keeps_first_and_last():
+    y = np.sin(np.linspace(0, 30, 5000))
+    idx = lttb(y, 300)
+    assert len(idx) == 300
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_spike():
+    y = np.zeros(1000)
+    y[637] = 10.0
+    assert 637 in lttb(y, 50)
+
+
+def test_lttb_no_downsampling_needed():
+    assert lttb(np.arange(10.0), 10).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize("n, points", [(7, None), (200, None), (1001, 100), (5, 3)])
+def test_binary_round_trip(n, points):
+    out = make_output(n, rate=0.14)
+    meta, arrays = decode(encode_binary(out, points))
+
+    scores = np.asarray(out["if"]["scores"], dtype=np.float32)
+    labels = np.asarray(out["if"]["labels"])
+    threat = np.asarray(out["reputation"]["threat_index"])
+
+    assert meta["n"] == n
+    assert meta["features"] == out["features"]
+    if points is None:
+        assert "score_index" not in arrays
+        assert np.array_equal(arrays["scores"], scores)
+    else:
+        assert len(arrays["scores"]) == points
+        assert np.array_equal(arrays["scores"], scores[arrays["score_index"]])
+    if "labels" in arrays:
+        assert labels.mean() > 1 / 32
+        assert np.array_equal(arrays["labels"], labels)
+    else:
+        assert np.array_equal(arrays["anomaly_index"], np.flatnonzero(labels))
+    assert np.array_equal(arrays["threat_index"], threat)
+    assert np.all(arrays["threat_score"] == 55)
+
+
+@pytest.mark.parametrize("n", [200, 1001])
+def test_rare_anomalies_sent_as_indices(n):
+    out = make_output(n, rate=0.01)
+    out["if"]["labels"][3] = 1
+    meta, arrays = decode(encode_binary(out))
+    assert "labels" not in arrays
+    assert np.array_equal(arrays["anomaly_index"], np.flatnonzero(out["if"]["labels"]))
+
+
+def test_json_always_sends_indices():
+    out = make_output(200, rate=0.14)
+    meta = encode_json(out, 50)
+    assert meta["if"]["anomaly_index"] == np.flatnonzero(out["if"]["labels"]).tolist()
+
+
+def test_points_below_three_rejected():
+    with pytest.raises(ValueError):
+        trim_output(make_output(10), 2)
@@ -6,10 +6,14 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import tempfile
 from sklearn.svm import OneClassSVM
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix
 
+# Model inputs — label/prediction columns (anomaly, *_predicted_anomaly) are never features
+FEATURE_COLS = ['src_port', 'dst_port', 'length']
+
 
 def load_training_data(filepath='data/simulated_google_traffic.csv'):
     """Load and prepare training data"""
@@ -24,11 +28,8 @@ def load_training_data(filepath='data/simulated_google_traffic.csv'):
 
 def prepare_features(df):
     """Extract and prepare features for training"""
-    # Select numeric features
-    feature_cols = ['src_port', 'dst_port', 'length']
-    
-    # Check which columns exist
-    available_cols = [col for col in feature_cols if col in df.columns]
+    # Check which feature columns exist
+    available_cols = [col for col in FEATURE_COLS if col in df.columns]
     
     if not available_cols:
         print("✗ No suitable feature columns found")
@@ -37,7 +38,9 @@ def prepare_features(df):
     X = df[available_cols].fillna(0).values
     
     # Get labels if available
-    y = df['anomaly'].values if 'anomaly' in df.columns else None
+    # (only when every row is labelled — ingested live rows carry no label)
+    labelled = 'anomaly' in df.columns and df['anomaly'].notna().all()
+    y = df['anomaly'].astype(int).values if labelled else None
     
     print(f"✓ Extracted features: {available_cols}")
     print(f"  Shape: {X.shape}")
@@ -104,7 +107,7 @@ def evaluate_model(model, X, y=None):
     # Compare with ground truth if available
     if y is not None:
         print(f"\n  Confusion Matrix:")
-        cm = confusion_matrix(y, pred_binary)
+        cm = confusion_matrix(y, pred_binary, labels=[0, 1])
         print(f"    TN: {cm[0,0]:4d} | FP: {cm[0,1]:4d}")
         print(f"    FN: {cm[1,0]:4d} | TP: {cm[1,1]:4d}")
         
@@ -114,6 +117,18 @@ def evaluate_model(model, X, y=None):
                                    zero_division=0))
 
 
+def _dump_atomic(obj, path):
+    """Pickle to a temp file next to path, then move it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
 def save_models(model, scaler, model_dir='models'):
     """Save trained models to disk"""
     os.makedirs(model_dir, exist_ok=True)
@@ -121,29 +136,20 @@ def save_models(model, scaler, model_dir='models'):
     model_path = os.path.join(model_dir, 'model.pkl')
     scaler_path = os.path.join(model_dir, 'scaler.pkl')
     
-    joblib.dump(model, model_path)
-    joblib.dump(scaler, scaler_path)
+    _dump_atomic(model, model_path)
+    _dump_atomic(scaler, scaler_path)
     
     print(f"\n✓ Models saved:")
     print(f"  {model_path}")
     print(f"  {scaler_path}")
 
 
-def main():
-    """Main training pipeline"""
-    print("=" * 60)
-    print("AI-IDS Model Training Pipeline")
-    print("=" * 60)
-    
-    # Load data
-    df = load_training_data()
-    if df is None:
-        return
-    
+def train_from_dataframe(df, model_dir='models'):
+    """Prepare, scale, train, evaluate and save models from a DataFrame"""
     # Prepare features
     X, y, feature_names = prepare_features(df)
     if X is None:
-        return
+        return None
     
     # Scale features
     print(f"\n=== Scaling Features ===")
@@ -173,7 +179,24 @@ def main():
     evaluate_model(model, X_scaled, y)
     
     # Save models
-    save_models(model, scaler)
+    save_models(model, scaler, model_dir=model_dir)
+    
+    return model, scaler
+
+
+def main():
+    """Main training pipeline"""
+    print("=" * 60)
+    print("AI-IDS Model Training Pipeline")
+    print("=" * 60)
+    
+    # Load data
+    df = load_training_data()
+    if df is None:
+        return
+    
+    if train_from_dataframe(df) is None:
+        return
     
     print("\n" + "=" * 60)
     print("Training Complete!")